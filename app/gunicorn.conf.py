@@ -0,0 +1,19 @@
+# Gunicorn settings for the M4Brew container (see Dockerfile CMD).
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+# Single process on purpose: the running job's worker thread, cancel state and
+# the settings/history caches live in web.py's module state. Concurrency comes
+# from threads so /history, /settings and /api/job polls never queue behind
+# each other.
+workers = 1
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", "8"))
+
+timeout = 120
+graceful_timeout = 30
+
+# Let file responses (send_file: history download) go out via sendfile(2)
+# instead of being copied through Python.
+sendfile = True
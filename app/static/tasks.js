@@ -449,11 +449,47 @@
 
     let mode = localStorage.getItem("m4brew_live_view") || "human";
 
+    // Tail the log: after the first full fetch only ask for bytes past what we
+    // already have. Reset when the server says it's a different job's log, or
+    // the file got shorter than our offset (cleared / replaced).
+    let logId = null;
+    let logOffset = 0;
+    let logDecoder = new TextDecoder();
+    let logBusy = false;  // one fetch at a time: overlapping ones would append the same bytes twice
+
     async function refreshLog(){
+      if(logBusy) return;
+      logBusy = true;
+      try{ await fetchLog(); }
+      finally{ logBusy = false; }
+    }
+
+    async function fetchLog(){
       try{
-        const r = await fetch("/job/output?ts=" + Date.now(), {cache:"no-store"});
-        const t = await r.text();
-        logPre.textContent = t;
+        const ranged = logOffset > 0;
+        const r = await fetch("/job/output", ranged
+          ? {cache:"no-store", headers:{"Range": "bytes=" + logOffset + "-"}}
+          : {cache:"no-cache"});
+
+        if(r.status === 416){
+          const m = /\/(\d+)$/.exec(r.headers.get("Content-Range") || "");
+          if(m && Number(m[1]) < logOffset){ logOffset = 0; return fetchLog(); }
+          return;  // nothing new
+        }
+        if(!r.ok) return;
+
+        const id = r.headers.get("X-M4Brew-Log") || "";
+        if(ranged && id !== logId){ logOffset = 0; return fetchLog(); }
+        logId = id;
+
+        const buf = await r.arrayBuffer();
+        if(r.status !== 206){
+          logDecoder = new TextDecoder();
+          logPre.textContent = "";
+          logOffset = 0;
+        }
+        logOffset += buf.byteLength;
+        logPre.textContent += logDecoder.decode(buf, {stream:true});
         logPre.scrollTop = logPre.scrollHeight;
       }catch(_){ }
     }
@@ -655,7 +691,7 @@
 
   async function tick(){
     try{
-      const r = await fetch("/api/job", {cache:"no-store"});
+      const r = await fetch("/api/job", {cache:"no-cache"});
       const job = await r.json();
 
       const jobRunning = (job && (job.status === "running" || job.status === "canceling"));
@@ -1,30 +1,107 @@
+import functools
 import json
 import os
+import re
+import shutil
 import subprocess
 import signal
 import threading
 import time
+from collections import deque
 from datetime import datetime, timezone
+from itertools import count, islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from flask import Flask, Response, jsonify, redirect, render_template, request, send_file, url_for
+from jinja2 import FileSystemBytecodeCache
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used without it
+    orjson = None
+
 
 # -------------------------
 # JSON helpers (atomic writes)
 # -------------------------
+def json_dumps(data, indent: bool = False) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_response(data, status: int = 200) -> Response:
+    # for hot polling endpoints: json_dumps (orjson) instead of Flask's jsonify
+    return Response(json_dumps(data), status=status, mimetype="application/json")
+
+
 def read_json(path: Path, default):
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        return json_loads(path.read_bytes())
     except Exception:
         return default
 
 
-def write_json(path: Path, data) -> None:
+# path -> (bytes we last wrote there, (st_mtime_ns, st_size) right after writing)
+_last_written: Dict[Path, Tuple[bytes, Tuple[int, int]]] = {}
+
+
+def _write_file(path: Path, payload: bytes, atomic: bool = True) -> None:
+    # Skip rewriting identical content, as long as the file is still exactly
+    # what we wrote (not deleted or edited by hand since).
+    prev = _last_written.get(path)
+    if prev is not None and prev[0] == payload:
+        try:
+            st = path.stat()
+            if (st.st_mtime_ns, st.st_size) == prev[1]:
+                return
+        except OSError:
+            pass
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
-    tmp.replace(path)
+    if atomic:
+        # write-then-rename: readers never see a torn file and no fsync is needed.
+        # The tmp name is per writer so concurrent saves can't clobber each other.
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(payload)
+        os.replace(tmp, path)
+    else:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, payload)
+        finally:
+            os.close(fd)
+    st = path.stat()
+    _last_written[path] = (payload, (st.st_mtime_ns, st.st_size))
+
+
+def write_json(path: Path, data, *, pretty: bool = False) -> None:
+    # pretty only for files people edit by hand; machine-read state stays compact
+    _write_file(path, json_dumps(data, indent=pretty) + b"\n")
+
+
+# documents below this size are rewritten in place by write_json_fast()
+JSON_FAST_MAX_BYTES = 4096
+
+
+def write_json_fast(path: Path, data) -> None:
+    """
+    Rewrite a small file in place (truncate + one write) instead of tmp + rename.
+
+    Only for state that is cheap to lose and whose readers hold the writer's
+    lock (job.json under _job_lock): a crash mid-write can leave the file
+    empty/truncated, which read_json() treats as "no job".
+    """
+    payload = json_dumps(data) + b"\n"
+    _write_file(path, payload, atomic=len(payload) >= JSON_FAST_MAX_BYTES)
 
 
 CONFIG_DIR = Path(os.environ.get("CONFIG_DIR", "/config"))
@@ -36,20 +113,54 @@ HISTORY_PATH = CONFIG_DIR / "history.jsonl"
 # Job state + output
 JOB_PATH = CONFIG_DIR / "job.json"
 JOB_OUT_PATH = CONFIG_DIR / "job_output.log"
+# Finished runs' output, one <job id>.log per history record
+RUNS_DIR = CONFIG_DIR / "runs"
+
+# Job status groups
+_ACTIVE_STATUSES = frozenset({"running", "canceling"})
+_FINAL_STATUSES = frozenset({"finished", "failed", "canceled"})
+
+_ALLOWED_MODES = frozenset({"convert", "correct", "cleanup"})
+_MODE_LABELS = {"convert": "Convert", "correct": "Rename", "cleanup": "Delete"}
+# summary field counted as "completed" in the history table, per mode
+_MODE_COMPLETED_KEY = {"convert": "created", "correct": "renamed", "cleanup": "deleted"}
 
 CANCEL_PATH = CONFIG_DIR / "cancel.flag"
 SCRIPT_PATH = Path(os.environ.get("SCRIPT_PATH", "/scripts/m4brew.sh"))
 HISTORY_MAX_LINES = int(os.environ.get("HISTORY_MAX_LINES", "100"))
+# history.jsonl is append-only; compact it back to HISTORY_MAX_LINES once it has
+# grown this many lines past the cap (i.e. at 2x, so trimming is amortised O(1)).
+HISTORY_TRIM_SLACK = max(32, HISTORY_MAX_LINES)
+# Minimum gap between job.json progress writes while a job's status is unchanged
+JOB_SAVE_INTERVAL_S = float(os.environ.get("JOB_SAVE_INTERVAL_S", "0.25"))
+# job_output.log is written in batches of this many lines / at least this often
+LOG_FLUSH_LINES = 64
+LOG_FLUSH_INTERVAL_S = 0.2
 
 app = Flask(__name__)
 app.config["MAX_CONTENT_LENGTH"] = 4294967296  # 4GB upload limit
 
+# Templates only change with a new image: skip the per-render reload check,
+# keep compiled templates in a bytecode cache and compile them all up front.
+app.config["TEMPLATES_AUTO_RELOAD"] = False
+app.jinja_env.auto_reload = False
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+for _name in app.jinja_env.list_templates(extensions=["html"]):
+    app.jinja_env.get_template(_name)
+
 
 # -------------------------
 # Time helpers
 # -------------------------
+_ISO_UTC_FMT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def utc_iso(epoch_s: int) -> str:
+    return time.strftime(_ISO_UTC_FMT, time.gmtime(epoch_s))
+
+
 def now_utc_iso() -> str:
-    return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+    return time.strftime(_ISO_UTC_FMT, time.gmtime())
 
 
 def parse_ts(ts: str) -> Optional[datetime]:
@@ -66,84 +177,273 @@ def parse_ts(ts: str) -> Optional[datetime]:
         return None
 
 
-def humanize_ts(ts: str) -> str:
+@functools.lru_cache(maxsize=HISTORY_MAX_LINES)
+def _ts_to_epoch(ts: str) -> Optional[int]:
+    # history timestamps never change once written, so parse each one once
+    dt = parse_ts(ts)
+    return int(dt.timestamp()) if dt else None
+
+
+def record_epoch(record: Dict[str, Any]) -> Optional[int]:
+    """Epoch seconds of a history record (older records only carry the ISO "ts")."""
+    epoch = record.get("ts_epoch")
+    if isinstance(epoch, int):
+        return epoch
+    ts = record.get("ts")
+    return _ts_to_epoch(ts) if ts else None
+
+
+def humanize_age(sec: int) -> str:
     """Return short age like 11s/4m/2h/3d."""
-    if not ts:
-        return ""
+    sec = max(0, sec)
+    if sec < 60:
+        return f"{sec}s"
+    m = sec // 60
+    if m < 60:
+        return f"{m}m"
+    h = m // 60
+    if h < 24:
+        return f"{h}h"
+    d = h // 24
+    return f"{d}d"
+
+
+def fmt_dur(v) -> str:
+    """Return short duration like 42s/5m/1h (bad input counts as 0s)."""
     try:
-        dt = parse_ts(ts)
-        if not dt:
-            return ""
-        sec = int((datetime.now(timezone.utc) - dt).total_seconds())
-        if sec < 0:
-            sec = 0
-
-        if sec < 60:
-            return f"{sec}s"
-        m = sec // 60
-        if m < 60:
-            return f"{m}m"
-        h = m // 60
-        if h < 24:
-            return f"{h}h"
-        d = h // 24
-        return f"{d}d"
+        sec = int(v or 0)
     except Exception:
-        return ""
+        sec = 0
+    if sec < 60:
+        return f"{sec}s"
+    m = sec // 60
+    if m < 60:
+        return f"{m}m"
+    h = m // 60
+    return f"{h}h"
 
 
 # -------------------------
 # Settings
 # -------------------------
+_settings_lock = threading.Lock()
+# ((st_mtime_ns, st_size), parsed settings) of the last read/write of SETTINGS_PATH
+_settings_cache: Optional[Tuple[Tuple[int, int], Dict[str, Any]]] = None
+
+
+def _settings_file_key() -> Optional[Tuple[int, int]]:
+    try:
+        st = SETTINGS_PATH.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
 def load_settings() -> Dict[str, Any]:
-    return read_json(SETTINGS_PATH, {})
+    global _settings_cache
+    with _settings_lock:
+        key = _settings_file_key()
+        if key is None:
+            return {}
+        cached = _settings_cache
+        if cached is not None and cached[0] == key:
+            return dict(cached[1])
+        settings = read_json(SETTINGS_PATH, {})
+        _settings_cache = (key, settings)
+        return dict(settings)
 
 
 def save_settings(settings: Dict[str, Any]) -> None:
-    write_json(SETTINGS_PATH, settings)
+    global _settings_cache
+    # write + stat + cache update as one step, so an overlapping save can't
+    # leave this dict cached under the other save's file key
+    with _settings_lock:
+        write_json(SETTINGS_PATH, settings, pretty=True)
+        key = _settings_file_key()
+        _settings_cache = (key, dict(settings)) if key is not None else None
 
 
 # -------------------------
 # History
 # -------------------------
-def read_history() -> List[Dict[str, Any]]:
-    if not HISTORY_PATH.exists():
+_history_lock = threading.Lock()
+_history_count: Optional[int] = None  # lines in HISTORY_PATH, counted lazily
+
+
+# Parsed HISTORY_PATH records (oldest first) and the (st_mtime_ns, st_size) they were read at
+_history_cache: Dict[str, Any] = {"key": None, "records": []}
+
+
+def _history_file_key() -> Optional[Tuple[int, int]]:
+    try:
+        st = HISTORY_PATH.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _load_history_file() -> List[Dict[str, Any]]:
+    try:
+        f = HISTORY_PATH.open("r", encoding="utf-8", errors="replace")
+    except FileNotFoundError:
         return []
+    # the file may run up to HISTORY_TRIM_SLACK lines over the cap between
+    # compactions; only the newest HISTORY_MAX_LINES are parsed
+    with f:
+        lines = deque((line for line in f if line.strip()), maxlen=HISTORY_MAX_LINES)
     out: List[Dict[str, Any]] = []
-    for line in HISTORY_PATH.read_text(encoding="utf-8", errors="replace").splitlines():
-        line = line.strip()
-        if not line:
-            continue
+    for line in lines:
         try:
-            out.append(json.loads(line))
+            out.append(json_loads(line))
         except Exception:
             continue
     return out
 
 
-def write_history(records: List[Dict[str, Any]]) -> None:
+def _cached_history() -> List[Dict[str, Any]]:
+    """Shared parsed history; history.jsonl is only re-read when its mtime/size change."""
+    with _history_lock:
+        key = _history_file_key()
+        if key is None:
+            return []
+        if _history_cache["key"] != key:
+            _history_cache["records"] = _load_history_file()
+            _history_cache["key"] = key
+        return _history_cache["records"]
+
+
+def read_history() -> List[Dict[str, Any]]:
+    return list(_cached_history())
+
+
+def iter_history_reversed() -> Iterator[Dict[str, Any]]:
+    """Yield history records newest first (shared cached dicts: copy before mutating)."""
+    return reversed(_cached_history())
+
+
+def _rewrite_history(records: List[Dict[str, Any]]) -> None:
+    global _history_count
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-    lines = [json.dumps(r, ensure_ascii=False) for r in records][-HISTORY_MAX_LINES:]
-    HISTORY_PATH.write_text("\n".join(lines) + ("\n" if lines else ""), encoding="utf-8")
+    lines = [json_dumps(r) for r in records][-HISTORY_MAX_LINES:]
+    HISTORY_PATH.write_bytes(b"\n".join(lines) + (b"\n" if lines else b""))
+    _history_count = len(lines)
+    _history_cache["records"] = list(records[-HISTORY_MAX_LINES:]) if lines else []
+    _history_cache["key"] = _history_file_key()
+
+
+def _compact_history() -> None:
+    """Keep only the newest HISTORY_MAX_LINES lines (copied verbatim, not re-parsed)."""
+    global _history_count
+    with HISTORY_PATH.open("r", encoding="utf-8", errors="replace") as f:
+        tail = deque((line for line in f if line.strip()), maxlen=HISTORY_MAX_LINES)
+    HISTORY_PATH.write_text("".join(tail), encoding="utf-8")
+    _history_count = len(tail)
+
+
+def write_history(records: List[Dict[str, Any]]) -> None:
+    with _history_lock:
+        _rewrite_history(records)
 
 
 def append_history_record(record: Dict[str, Any]) -> None:
-    records = read_history()
-    records.append(record)
-    write_history(records)
+    global _history_count
+    line = json_dumps(record) + b"\n"
+    with _history_lock:
+        if _history_count is None:
+            try:
+                _history_count = HISTORY_PATH.read_bytes().count(b"\n")
+            except FileNotFoundError:
+                _history_count = 0
+        # if the cache matches the file, extend it in place of a re-read on the next view
+        cache_fresh = _history_cache["key"] == _history_file_key()
+        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+        with HISTORY_PATH.open("ab") as f:
+            f.write(line)
+        _history_count += 1
+        if _history_count > HISTORY_MAX_LINES + HISTORY_TRIM_SLACK:
+            _compact_history()
+        if cache_fresh:
+            records = _history_cache["records"] + [json_loads(line)]
+            _history_cache["records"] = records[-HISTORY_MAX_LINES:]
+            _history_cache["key"] = _history_file_key()
+
+
+def _archive_job_output(job_id: str) -> Optional[str]:
+    """
+    Keep this run's job_output.log as RUNS_DIR/<job_id>.log; returns the file name.
+
+    Job ids only have one-second resolution, so a run that finishes in the same
+    second as the previous one gets <job_id>-1.log, -2.log, ... instead of
+    overwriting that run's log.
+    """
+    if not job_id:
+        return None
+    try:
+        RUNS_DIR.mkdir(parents=True, exist_ok=True)
+        for n in count():
+            name = f"{job_id}.log" if n == 0 else f"{job_id}-{n}.log"
+            dest = RUNS_DIR / name
+            try:
+                os.link(JOB_OUT_PATH, dest)  # same inode, no copy
+            except FileExistsError:
+                continue
+            except OSError:
+                # no hard links here: copy instead, still never overwriting
+                try:
+                    with JOB_OUT_PATH.open("rb") as src, dest.open("xb") as dst:
+                        shutil.copyfileobj(src, dst)
+                except FileExistsError:
+                    continue
+            return name
+    except Exception:
+        return None
+    return None
+
+
+def read_run_output(record: Dict[str, Any]) -> str:
+    """Output of a history record: its run log, or the inline "output" of older records."""
+    name = record.get("output_log")
+    if not name:
+        return str(record.get("output") or "")
+    try:
+        return (RUNS_DIR / Path(str(name)).name).read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return ""
+
+
+def _prune_run_logs(keep: int = HISTORY_MAX_LINES) -> None:
+    # job ids are UTC timestamps, so (job id, -N suffix) order is age order
+    def age_key(p: Path) -> Tuple[str, int]:
+        job_id, _, n = p.stem.partition("-")
+        return (job_id, int(n) if n.isdigit() else 0)
+
+    try:
+        logs = sorted(RUNS_DIR.glob("*.log"), key=age_key)
+    except OSError:
+        return
+    for p in logs[:-keep] if keep > 0 else logs:
+        try:
+            p.unlink()
+        except OSError:
+            pass
+
+
+_SUMMARY_MARKER = "__M4B_SUMMARY_JSON__"
+_SUMMARY_MARKER_B = _SUMMARY_MARKER.encode()
+# the payload is the JSON object on the rest of the marker's line ("." stops at "\n")
+_SUMMARY_RE = re.compile(re.escape(_SUMMARY_MARKER) + r"[ \t]*(\{.*\})")
 
 
 def parse_summary_from_output(output: str) -> Optional[Dict[str, Any]]:
-    marker = "__M4B_SUMMARY_JSON__"
-    last = None
-    for line in output.splitlines():
-        if marker in line:
-            last = line
-    if not last:
+    # only the last summary line counts; scan for it from the end
+    idx = output.rfind(_SUMMARY_MARKER)
+    if idx < 0:
+        return None
+    m = _SUMMARY_RE.match(output, idx)
+    if not m:
         return None
     try:
-        payload = last.split(marker, 1)[1].strip()
-        return json.loads(payload)
+        return json_loads(m.group(1))
     except Exception:
         return None
 
@@ -151,24 +451,69 @@ def parse_summary_from_output(output: str) -> Optional[Dict[str, Any]]:
 # -------------------------
 # Job persistence
 # -------------------------
+# Parsed JOB_PATH and the (st_mtime_ns, st_size) it was read/written at; /api/job
+# is polled constantly, so an unchanged job.json costs one stat.
+_job_lock = threading.Lock()
+_job_cache: Dict[str, Any] = {"key": None, "job": {}}
+
+
+def _job_file_key() -> Optional[Tuple[int, int]]:
+    try:
+        st = JOB_PATH.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
 def _load_job() -> Dict[str, Any]:
-    return read_json(JOB_PATH, {})
+    with _job_lock:
+        key = _job_file_key()
+        if key is None:
+            return {}
+        if _job_cache["key"] != key:
+            _job_cache["job"] = read_json(JOB_PATH, {})
+            _job_cache["key"] = key
+        return dict(_job_cache["job"])
 
 
 def _save_job(job: Dict[str, Any]) -> None:
-    write_json(JOB_PATH, job)
+    with _job_lock:
+        write_json_fast(JOB_PATH, job)
+        _job_cache["job"] = dict(job)
+        _job_cache["key"] = _job_file_key()
+
+
+# The job started by this process. Its worker thread updates this dict in
+# place, so routes read progress straight from memory; job.json is only the
+# fallback (e.g. after a restart) and what survives the process.
+_live_job: Optional[Dict[str, Any]] = None
+
+
+def _current_job() -> Dict[str, Any]:
+    live = _live_job
+    if live is not None:
+        return dict(live)
+    return _load_job()
 
 
 def _pid_is_running(pid: Optional[int]) -> bool:
     if not pid or pid <= 0:
         return False
-    return Path(f"/proc/{pid}").exists()
+    try:
+        os.kill(pid, 0)  # signal 0: existence check only
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by someone else
+    except Exception:
+        return False  # e.g. a stale pid out of range for this platform
+    return True
 
 
 def _job_is_running(job: Dict[str, Any]) -> bool:
     if not job:
         return False
-    if job.get("status") not in ("running", "canceling"):
+    if job.get("status") not in _ACTIVE_STATUSES:
         return False
     pid = job.get("pid")
     try:
@@ -190,21 +535,25 @@ def _scan_total(mode: str, root_folder: str) -> int:
 
     # build list of ROOT/Author/Book dirs
     book_dirs: List[Path] = []
+    # (scandir's DirEntry.is_dir() answers from the directory listing, no stat per entry;
+    # symlinked dirs are skipped, like the script's `find -type d`, which doesn't follow them)
     try:
-        for author_dir in root.iterdir():
-            if not author_dir.is_dir():
-                continue
-            if author_dir.name == "#recycle":
-                continue
-            for book_dir in author_dir.iterdir():
-                if book_dir.is_dir():
-                    book_dirs.append(book_dir)
+        with os.scandir(root) as authors:
+            for author_entry in authors:
+                if author_entry.name == "#recycle" or not author_entry.is_dir(follow_symlinks=False):
+                    continue
+                with os.scandir(author_entry.path) as books:
+                    for book_entry in books:
+                        if book_entry.is_dir(follow_symlinks=False):
+                            book_dirs.append(Path(book_entry.path))
     except Exception:
         return 0
 
     if mode == "cleanup":
+        # convert only ever creates ROOT/Author/Book/_backup_files, so check the
+        # book dirs we already have instead of walking every file under ROOT
         try:
-            return sum(1 for p in root.rglob("_backup_files") if p.is_dir())
+            return sum(1 for bd in book_dirs if (bd / "_backup_files").is_dir())
         except Exception:
             return 0
 
@@ -214,21 +563,36 @@ def _scan_total(mode: str, root_folder: str) -> int:
         for book_dir in book_dirs:
             author = book_dir.parent.name
             book = book_dir.name
-            m4bs = list(book_dir.glob("*.m4b"))
+            try:
+                with os.scandir(book_dir) as it:
+                    m4bs = [e.name for e in it if e.name.endswith(".m4b")]
+            except OSError:
+                continue
             if len(m4bs) != 1:
                 continue
             desired_name = f"{book} - {author}.m4b"
-            if m4bs[0].name != desired_name:
+            if m4bs[0] != desired_name:
                 n += 1
         return n
 
-    # convert
+    # convert: one directory read per book
     n = 0
     for book_dir in book_dirs:
-        m4bs = [p for p in book_dir.glob("*.m4b") if not (p.name.startswith(".tmp_") or p.name.startswith("tmp_"))]
-        if len(m4bs) == 1 and not list(book_dir.glob("*.mp3")) and not list(book_dir.glob("*.m4a")):
-            continue  # already has single m4b, skip
-        if list(book_dir.glob("*.mp3")) or list(book_dir.glob("*.m4a")) or len(m4bs) > 1:
+        m4b_count = 0
+        has_src = False
+        try:
+            with os.scandir(book_dir) as it:
+                for e in it:
+                    name = e.name
+                    if name.endswith(".m4b"):
+                        if not name.startswith((".tmp_", "tmp_")):
+                            m4b_count += 1
+                    elif name.endswith((".mp3", ".m4a")):
+                        has_src = True
+        except OSError:
+            continue
+        # a single m4b with no mp3/m4a sources is already done
+        if has_src or m4b_count > 1:
             n += 1
     return n
 
@@ -241,11 +605,23 @@ def _kill_job_labeled_containers(job_id: str) -> None:
     if not job_id:
         return
     # kill anything spawned with label m4brew_job=<job_id>
-    cmd = (
-        f'ids=$(docker ps -aq --filter "label=m4brew_job={job_id}"); '
-        f'[ -n "$ids" ] && docker rm -f $ids >/dev/null 2>&1 || true'
+    # (docker rm has no --filter, so list the ids and pass them as argv; no shell)
+    ps = subprocess.run(
+        ["docker", "ps", "-aq", "--filter", f"label=m4brew_job={job_id}"],
+        capture_output=True,
+        text=True,
+        check=False,
+        timeout=10,
     )
-    subprocess.run(["sh", "-lc", cmd], check=False)
+    ids = ps.stdout.split()
+    if ids:
+        subprocess.run(
+            ["docker", "rm", "-f", *ids],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+            timeout=10,
+        )
 
 
 def _signal_proc_group(pid: Optional[int]) -> None:
@@ -271,7 +647,18 @@ def _signal_proc_group(pid: Optional[int]) -> None:
         pass
 
 
-def _is_cancel_requested(job_id: str) -> bool:
+# job id -> Event set by job_cancel(); lets the worker poll cancel without touching job.json
+_cancel_events: Dict[str, threading.Event] = {}
+# job.json is still consulted (at most this often) for cancels set from outside this process
+CANCEL_DISK_CHECK_S = 1.0
+
+
+def _is_cancel_requested(job_id: str, check_disk: bool = True) -> bool:
+    ev = _cancel_events.get(job_id)
+    if ev is not None and ev.is_set():
+        return True
+    if not check_disk:
+        return False
     try:
         persisted = _load_job()
         return bool(persisted and persisted.get("id") == job_id and persisted.get("cancel_requested"))
@@ -282,6 +669,31 @@ def _is_cancel_requested(job_id: str) -> bool:
 # -------------------------
 # Background runner (stream output, update progress)
 # -------------------------
+def _iter_output_lines(stream) -> Iterator[bytes]:
+    """
+    Yield lines from a binary pipe, each ending in a single newline.
+
+    Like text mode's universal newlines, CRLF and a bare CR also end a line, so
+    ffmpeg's CR-terminated -stats progress shows up line by line while it runs
+    instead of as one huge line at the end.
+    """
+    buf = b""
+    skip_lf = False  # last chunk ended in CR; a leading LF here completes that CRLF
+    while True:
+        chunk = stream.read1(1 << 16)
+        if not chunk:
+            break
+        if skip_lf and chunk.startswith(b"\n"):
+            chunk = chunk[1:]
+        skip_lf = chunk.endswith(b"\r")
+        lines = (buf + chunk).replace(b"\r\n", b"\n").replace(b"\r", b"\n").split(b"\n")
+        buf = lines.pop()
+        for line in lines:
+            yield line + b"\n"
+    if buf:
+        yield buf + b"\n"
+
+
 def _run_script_background(job: Dict[str, Any], env: Dict[str, str]) -> None:
     """
     Run the bash script, stream output to JOB_OUT_PATH, and keep job.json updated.
@@ -293,50 +705,101 @@ def _run_script_background(job: Dict[str, Any], env: Dict[str, str]) -> None:
       - Then we finalize as canceled (exit_code 130), regardless of script summary
     """
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-    JOB_OUT_PATH.write_text("", encoding="utf-8")
 
     job_id = str(job.get("id") or "")
     start = time.time()
 
-    last_fp: Optional[str] = None
+    last_snap: Dict[str, Any] = {}
+    save_lock = threading.Lock()
+    last_save_t = 0.0
+    last_status: Optional[str] = None
+    pending_save: Optional[Dict[str, Any]] = None  # latest throttled update, written by the flusher
 
     def _save(j: dict) -> None:
-        nonlocal last_fp
+        nonlocal last_snap, pending_save
         # Only persist updates for the same job id
         if str(j.get("id") or "") != job_id:
             return
 
-        # Preserve cancel_requested if UI wrote it into job.json
-        try:
-            persisted = _load_job()
-            if persisted and persisted.get("id") == job_id and persisted.get("cancel_requested"):
-                j["cancel_requested"] = True
-        except Exception:
-            pass
-
-        # Fingerprint everything except 'updated' so we don't rewrite job.json unnecessarily
-        try:
-            snap = dict(j)
-            snap.pop("updated", None)
-            fp = json.dumps(snap, sort_keys=True, default=str)
-        except Exception:
-            fp = None
+        # job_cancel() marks cancel_requested on this same live dict, so there's
+        # no need to re-read job.json to preserve it.
 
-        if fp is not None and fp == last_fp:
+        # Compare everything except 'updated' so we don't rewrite job.json unnecessarily
+        # (values are replaced, never mutated in place, so a shallow copy is enough)
+        snap = {k: v for k, v in j.items() if k != "updated"}
+        if snap == last_snap:
             return
-
+        last_snap = snap
+
+        # Throttle: while the status is unchanged, write at most once per
+        # JOB_SAVE_INTERVAL_S; the flusher thread writes the latest skipped
+        # update so a quiet stretch of output doesn't leave job.json stale.
+        with save_lock:
+            if time.monotonic() - last_save_t < JOB_SAVE_INTERVAL_S and j.get("status") == last_status:
+                pending_save = j
+                return
+            _write(j)
+
+    def _write(j: dict) -> None:
+        # caller holds save_lock
+        nonlocal last_save_t, last_status, pending_save
+        pending_save = None
         j["updated"] = now_utc_iso()
         _save_job(j)
-        last_fp = fp
+        last_save_t = time.monotonic()
+        last_status = j.get("status")
+
+    def _flush_pending_save() -> None:
+        with save_lock:
+            if pending_save is not None and time.monotonic() - last_save_t >= JOB_SAVE_INTERVAL_S:
+                _write(pending_save)
+
+    # one handle for the whole run; script output is copied through as bytes;
+    # append mode so the cancel note written by job_cancel() is never overwritten
+    log_fh = JOB_OUT_PATH.open("ab", buffering=0)
+    log_buf: List[bytes] = []
+    log_lock = threading.Lock()
+    log_flush_t = time.monotonic()
+
+    def flush_log() -> None:
+        nonlocal log_flush_t
+        with log_lock:
+            if log_buf:
+                log_fh.write(b"".join(log_buf))
+                log_buf.clear()
+            log_flush_t = time.monotonic()
+
+    def write_log(data: bytes) -> None:
+        # Batch lines: write every LOG_FLUSH_LINES lines or LOG_FLUSH_INTERVAL_S,
+        # whichever comes first; the flusher thread writes the tail when output
+        # goes quiet so /job/output never lags by much more than the interval.
+        with log_lock:
+            log_buf.append(data)
+            if len(log_buf) < LOG_FLUSH_LINES and time.monotonic() - log_flush_t < LOG_FLUSH_INTERVAL_S:
+                return
+        flush_log()
+
+    # One long-lived helper per run (not a timer per batch) flushes whatever
+    # the stream loop has left buffered: log lines and a throttled job.json update.
+    flusher_stop = threading.Event()
+
+    def _flusher() -> None:
+        while not flusher_stop.wait(LOG_FLUSH_INTERVAL_S):
+            flush_log()
+            _flush_pending_save()
+
+    flusher = threading.Thread(target=_flusher, name=f"m4brew-flush-{job_id}", daemon=True)
 
     def write_line(line: str) -> None:
-        with JOB_OUT_PATH.open("a", encoding="utf-8", errors="replace") as f:
-            f.write(line)
+        write_log(line.encode("utf-8", "replace"))
 
     def strip_log_prefix(s: str) -> str:
         s = s.strip()
-        if s.startswith("[") and "] " in s:
-            return s.split("] ", 1)[1].strip()
+        if s.startswith("["):
+            # the script's "[HH:MM:SS] " stamp; don't scan the rest of the line
+            i = s.find("] ", 0, 64)
+            if i != -1:
+                return s[i + 2:].lstrip()
         return s
 
     def set_if_changed(j: Dict[str, Any], key: str, val: Any) -> bool:
@@ -350,9 +813,8 @@ def _run_script_background(job: Dict[str, Any], env: Dict[str, str]) -> None:
         cmd,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        text=True,
         env=env,
-        bufsize=1,
+        bufsize=1 << 16,
         start_new_session=True,  # critical: makes proc.pid the PGID for killpg()
     )
 
@@ -373,15 +835,49 @@ def _run_script_background(job: Dict[str, Any], env: Dict[str, str]) -> None:
     if changed:
         _save(job)
 
+    # per-line handlers, keyed on the "KEY:" prefix the script prints
+    def on_divider() -> None:
+        nonlocal current
+        current += 1
+        changed = False
+        changed |= set_if_changed(job, "current", current)
+        changed |= set_if_changed(job, "current_book", current_book)
+        changed |= set_if_changed(job, "current_path", current_path)
+        if changed:
+            _save(job)
+
+    def on_book(rest: str) -> None:
+        nonlocal current_book
+        current_book = rest.strip()
+        if set_if_changed(job, "current_book", current_book):
+            _save(job)
+
+    def on_path(rest: str) -> None:
+        nonlocal current_path
+        current_path = rest.strip()
+        if set_if_changed(job, "current_path", current_path):
+            _save(job)
+
+    line_handlers = {"BOOK": on_book, "PATH": on_path}
+    divider = "-" * 40
+
     canceled_early = False
+    cancel_checked_t = 0.0
+    last_summary_line: Optional[str] = None
     rc: Optional[int] = None
 
+    flusher.start()
     try:
         assert proc.stdout is not None
-        for raw in proc.stdout:
+        for raw in _iter_output_lines(proc.stdout):
             # Cancel check *during* streaming (this is what you were missing)
-            if _is_cancel_requested(job_id):
+            now = time.monotonic()
+            check_disk = now - cancel_checked_t >= CANCEL_DISK_CHECK_S
+            if check_disk:
+                cancel_checked_t = now
+            if _is_cancel_requested(job_id, check_disk):
                 canceled_early = True
+                job["cancel_requested"] = True  # may have come from job.json only
                 if job.get("status") != "canceling":
                     job["status"] = "canceling"
                     _save(job)
@@ -398,34 +894,30 @@ def _run_script_background(job: Dict[str, Any], env: Dict[str, str]) -> None:
                 write_line("\n[cancel] Forced stop initiated.\n")
                 break
 
-            line = raw if raw.endswith("\n") else raw + "\n"
-            write_line(line)
-
-            s = strip_log_prefix(line)
+            write_log(raw)
 
-            # your script prints a divider per-book
-            if s.startswith("----------------------------------------"):
-                current += 1
-                changed = False
-                changed |= set_if_changed(job, "current", current)
-                changed |= set_if_changed(job, "current_book", current_book)
-                changed |= set_if_changed(job, "current_path", current_path)
-                if changed:
-                    _save(job)
+            # most lines are plain progress: only decode the ones we parse
+            if not (b"BOOK:" in raw or b"PATH:" in raw or b"----------" in raw or _SUMMARY_MARKER_B in raw):
                 continue
 
-            if s.startswith("BOOK:"):
-                current_book = s.split("BOOK:", 1)[1].strip()
-                if set_if_changed(job, "current_book", current_book):
-                    _save(job)
+            s = strip_log_prefix(raw.decode("utf-8", "replace"))
+
+            if _SUMMARY_MARKER in s:
+                last_summary_line = s
                 continue
 
-            if s.startswith("PATH:"):
-                current_path = s.split("PATH:", 1)[1].strip()
-                if set_if_changed(job, "current_path", current_path):
-                    _save(job)
+            # your script prints a divider per-book
+            if s.startswith(divider):
+                on_divider()
                 continue
 
+            key, sep, rest = s.partition(":")
+            handler = line_handlers.get(key) if sep else None
+            if handler is not None:
+                handler(rest)
+
+        flush_log()
+
         # Wait for process to end (if we broke out due to cancel, it may still be dying)
         try:
             rc = proc.wait(timeout=10 if canceled_early else None)  # type: ignore[arg-type]
@@ -440,8 +932,7 @@ def _run_script_background(job: Dict[str, Any], env: Dict[str, str]) -> None:
             except Exception:
                 rc = 130 if canceled_early else 1
 
-        full_output = JOB_OUT_PATH.read_text(encoding="utf-8", errors="replace")
-        summary = parse_summary_from_output(full_output)
+        summary = parse_summary_from_output(last_summary_line) if last_summary_line else None
 
         runtime_s = max(1, int(time.time() - start))
         if isinstance(summary, dict):
@@ -463,6 +954,23 @@ def _run_script_background(job: Dict[str, Any], env: Dict[str, str]) -> None:
             summary["reason"] = "canceled"
             summary["runtime_s"] = runtime_s
 
+        # Archive the log and record history *before* the terminal status goes
+        # out (this dict is _live_job): once the job looks finished, /job/clear
+        # may delete job_output.log.
+        ts_epoch = int(time.time())
+        record = {
+            "ts": utc_iso(ts_epoch),
+            "ts_epoch": ts_epoch,
+            "mode": job.get("mode"),
+            "dry_run": job.get("dry_run"),
+            "settings": job.get("settings"),
+            "exit_code": final_exit,
+            "summary": summary,
+            "output_log": _archive_job_output(job_id),
+        }
+        append_history_record(record)
+        _prune_run_logs()
+
         changed = False
         changed |= set_if_changed(job, "status", final_status)
         changed |= set_if_changed(job, "exit_code", final_exit)
@@ -475,17 +983,6 @@ def _run_script_background(job: Dict[str, Any], env: Dict[str, str]) -> None:
         if changed:
             _save(job)
 
-        record = {
-            "ts": now_utc_iso(),
-            "mode": job.get("mode"),
-            "dry_run": job.get("dry_run"),
-            "settings": job.get("settings"),
-            "exit_code": final_exit,
-            "summary": summary,
-            "output": full_output,
-        }
-        append_history_record(record)
-
     except Exception as e:
         runtime_s = max(1, int(time.time() - start))
         cancel_requested = _is_cancel_requested(job_id)
@@ -501,25 +998,44 @@ def _run_script_background(job: Dict[str, Any], env: Dict[str, str]) -> None:
         job["pid"] = None
         _save(job)
         write_line(f"\n[worker-error] {e}\n")
+    finally:
+        flusher_stop.set()
+        flusher.join()
+        flush_log()
+        log_fh.close()
+        _cancel_events.pop(job_id, None)
+
+
+# The only inherited variables scripts/m4brew.sh (and the docker CLI it drives) reads;
+# captured once instead of copying the whole container environment per job.
+_SCRIPT_ENV_KEYS = (
+    "PATH", "HOME", "LANG", "LC_ALL", "TZ", "HOSTNAME",
+    "PUID", "PGID", "DOCKER_UID", "DOCKER_GID", "DOCKER_UID_GID", "DOCKER_NETWORK",
+    "M4BREW_CONTAINER_NAME",
+    "DOCKER_HOST", "DOCKER_CONFIG", "DOCKER_CERT_PATH", "DOCKER_TLS_VERIFY",
+)
+_SCRIPT_BASE_ENV = {k: os.environ[k] for k in _SCRIPT_ENV_KEYS if k in os.environ}
 
 
 def start_job(mode: str, dry_run: bool, root_folder: str, audio_mode: str, bitrate) -> Dict[str, Any]:
+    global _live_job
     root_folder = (root_folder or "").strip()
     if not root_folder:
         return {"status": "error", "error": "root_folder_not_set"}
-    existing = _load_job()
+    existing = _current_job()
     if _job_is_running(existing):
         return existing
 
-    job_id = now_utc_iso().replace(":", "").replace("-", "").replace("T", "_").replace("Z", "")
+    now_iso = now_utc_iso()
+    job_id = now_iso.replace(":", "").replace("-", "").replace("T", "_").replace("Z", "")
     total = _scan_total(mode, root_folder)
 
     job = {
         "id": job_id,
         "cancel_requested": False,
         "status": "running",
-        "started": now_utc_iso(),
-        "updated": now_utc_iso(),
+        "started": now_iso,
+        "updated": now_iso,
         "mode": mode,
         "dry_run": dry_run,
         "settings": {"root_folder": root_folder, "audio_mode": audio_mode, "bitrate": bitrate},
@@ -532,9 +1048,15 @@ def start_job(mode: str, dry_run: bool, root_folder: str, audio_mode: str, bitra
         "runtime_s": None,
         "summary": None,
     }
+    # Start a fresh log rather than truncating (the previous run's log may be
+    # hard-linked into RUNS_DIR), and before job.json names the new job, so a
+    # /job/output response tagged with this id never carries the old log.
+    JOB_OUT_PATH.unlink(missing_ok=True)
+    _cancel_events[job_id] = threading.Event()
     _save_job(job)
+    _live_job = job
 
-    env = os.environ.copy()
+    env = dict(_SCRIPT_BASE_ENV)
     env.update(
         {
             "MODE": mode,
@@ -556,7 +1078,7 @@ def start_job(mode: str, dry_run: bool, root_folder: str, audio_mode: str, bitra
 @app.get("/")
 def index_get():
     settings = load_settings()
-    job = _load_job()
+    job = _current_job()
     return render_template("index.html", settings=settings, job=job, active_page="tasks")
 
 
@@ -566,6 +1088,8 @@ def index_post():
 
     # Tasks page only chooses mode + dry_run
     mode = (request.form.get("mode") or settings.get("mode") or "convert").strip().lower()
+    if mode not in _ALLOWED_MODES:
+        mode = "convert"  # same fallback as scripts/m4brew.sh
     dry_run = str(request.form.get("dry_run") or settings.get("dry_run") or "true").lower() == "true"
 
     # Everything else comes from saved Settings
@@ -600,9 +1124,9 @@ def index_post():
 
 @app.get("/api/job")
 def api_job():
-    job = _load_job()
+    job = _current_job()
     if not job:
-        return jsonify({"status": "none"})
+        return json_response({"status": "none"})
 
     # IMPORTANT: api_job() is READ-ONLY.
     # It must not call _save_job() or mutate persisted state.
@@ -630,7 +1154,7 @@ def api_job():
         status = resp["status"]
 
     # For finished/failed: pid is always stale in UI; hide it.
-    if status in ("finished", "failed", "canceled"):
+    if status in _FINAL_STATUSES:
         resp["pid"] = None
 
         # runtime_s: derive for display if missing/0, but do not write back.
@@ -652,12 +1176,9 @@ def api_job():
             if srs > 0:
                 rs = srs
             else:
-                dt_start = parse_ts(str(resp.get("started") or ""))
-                dt_end = parse_ts(str(resp.get("updated") or "")) or datetime.now(timezone.utc)
-                if dt_start and dt_end:
-                    rs = max(1, int((dt_end - dt_start).total_seconds()))
-                else:
-                    rs = 1
+                start_s = _ts_to_epoch(str(resp.get("started") or ""))
+                end_s = _ts_to_epoch(str(resp.get("updated") or "")) or int(time.time())
+                rs = max(1, end_s - start_s) if start_s is not None else 1
 
             resp["runtime_s"] = rs
 
@@ -668,7 +1189,12 @@ def api_job():
             summary["runtime_s"] = rs
             resp["summary"] = summary
 
-    return jsonify(resp)
+    # Most polls see an unchanged job: let the browser revalidate with
+    # If-None-Match and answer 304 with no body.
+    r = json_response(resp)
+    r.add_etag()
+    r.cache_control.no_cache = True
+    return r.make_conditional(request)
 
 
 @app.get("/about")
@@ -678,16 +1204,26 @@ def about_get():
 
 @app.get("/job/output")
 def job_output():
+    """
+    Current job log. send_file handles ETag/304 and Range requests, so the
+    Tasks page tails the log with "Range: bytes=<offset>-" instead of
+    re-downloading it; X-M4Brew-Log names the job the log belongs to.
+    """
+    log_id = str(_current_job().get("id") or "")
     if not JOB_OUT_PATH.exists():
-        return Response("", mimetype="text/plain")
-    return Response(JOB_OUT_PATH.read_text(encoding="utf-8", errors="replace"), mimetype="text/plain")
+        return Response("", mimetype="text/plain", headers={"X-M4Brew-Log": log_id})
+    r = send_file(JOB_OUT_PATH, mimetype="text/plain", conditional=True, max_age=0)
+    r.headers["X-M4Brew-Log"] = log_id
+    return r
 
 
 @app.post("/job/clear")
 def job_clear():
-    job = _load_job()
-    if job and job.get("status") in ("running", "canceling"):
+    global _live_job
+    job = _current_job()
+    if job and job.get("status") in _ACTIVE_STATUSES:
         return redirect(url_for("index_get"))
+    _live_job = None
     try:
         JOB_PATH.unlink(missing_ok=True)  # type: ignore[arg-type]
     except Exception:
@@ -701,14 +1237,22 @@ def job_clear():
 
 @app.post("/job/cancel")
 def job_cancel():
-    job = _load_job()
-    if not job or job.get("status") not in ("running", "canceling"):
+    job = _current_job()
+    if not job or job.get("status") not in _ACTIVE_STATUSES:
         return redirect(url_for("index_get"))
 
     pid = job.get("pid")
     job_id = str(job.get("id") or "").strip()
 
-    # Mark intent (worker will also react mid-stream)
+    # Mark intent (worker will also react mid-stream). The live dict is the
+    # one the worker saves, so mark it before writing job.json ourselves.
+    live = _live_job
+    if live is not None and live.get("id") == job.get("id"):
+        live["cancel_requested"] = True
+        live["status"] = "canceling"
+    ev = _cancel_events.get(job_id)
+    if ev is not None:
+        ev.set()
     job["cancel_requested"] = True
     job["status"] = "canceling"
     _save_job(job)
@@ -777,74 +1321,58 @@ def settings_post():
     return redirect(url_for("settings_get"))
 
 
-@app.get("/history")
-def history_get():
-    records = list(reversed(read_history()))  # newest first
-
-    def fmt_dur(v) -> str:
-        try:
-            sec = int(v or 0)
-        except Exception:
-            sec = 0
-        if sec < 60:
-            return f"{sec}s"
-        m = sec // 60
-        if m < 60:
-            return f"{m}m"
-        h = m // 60
-        return f"{h}h"
-
-    mode_labels = {"convert": "Convert", "correct": "Rename", "cleanup": "Delete"}
-
-    enriched = []
+def _enrich_history(records: Iterator[Dict[str, Any]], now_s: int) -> Iterator[Dict[str, Any]]:
+    """Yield the per-row view dicts for the history table (rendered lazily by Jinja)."""
     for i, r in enumerate(records):
         ts = r.get("ts", "") or ""
-        summary = r.get("summary") or {}
+        epoch = record_epoch(r)
+        sget = (r.get("summary") or {}).get
         exit_code = int(r.get("exit_code") or 0)
 
-        success = bool(summary.get("success", exit_code == 0))
-        runtime_s = summary.get("runtime_s")
+        success = bool(sget("success", exit_code == 0))
+        runtime_s = sget("runtime_s")
         runtime_h = fmt_dur(runtime_s)
 
         mode = (r.get("mode") or "").lower()
-        created = summary.get("created")
-        renamed = summary.get("renamed")
-        deleted = summary.get("deleted")
-        skipped = summary.get("skipped")
-        failed = summary.get("failed")
-
-        completed = created if mode == "convert" else (renamed if mode == "correct" else (deleted if mode == "cleanup" else 0))
-
-        enriched.append(
-            {
-                "idx": i,
-                "ts": ts,
-                "ts_human": humanize_ts(ts) if ts else "",
-                "mode": mode,
-                "mode_label": mode_labels.get(mode, mode),
-                "dry_run": bool(r.get("dry_run", False)),
-                "success": success,
-                "exit_code": exit_code,
-                "runtime_s": runtime_s,
-                "runtime_h": runtime_h,
-                "completed": completed,
-                "created": created,
-                "skipped": skipped,
-                "failed": failed,
-            }
-        )
+        completed_key = _MODE_COMPLETED_KEY.get(mode)
+
+        yield {
+            "idx": i,
+            "ts": ts,
+            "ts_human": humanize_age(now_s - epoch) if epoch is not None else "",
+            "mode": mode,
+            "mode_label": _MODE_LABELS.get(mode, mode),
+            "dry_run": bool(r.get("dry_run", False)),
+            "success": success,
+            "exit_code": exit_code,
+            "runtime_s": runtime_s,
+            "runtime_h": runtime_h,
+            "completed": sget(completed_key) if completed_key else 0,
+            "created": sget("created"),
+            "skipped": sget("skipped"),
+            "failed": sget("failed"),
+        }
+
 
-    return render_template("history.html", runs=enriched, count=len(enriched), settings=load_settings(), active_page="history")
+@app.get("/history")
+def history_get():
+    # the shared cached list (replaced, never mutated, on append/rewrite); no copy needed
+    records = _cached_history()
+    runs = _enrich_history(reversed(records), int(time.time()))  # newest first
+    return render_template("history.html", runs=runs, count=len(records), settings=load_settings(), active_page="history")
 
 
 @app.get("/history/<int:idx>")
 def history_detail(idx: int):
-    records = list(reversed(read_history()))
-    if idx < 0 or idx >= len(records):
+    if idx < 0:
+        return "Not found", 404
+    r = next(islice(iter_history_reversed(), idx, None), None)
+    if r is None:
         return "Not found", 404
-    r = records[idx]
-    ts = r.get("ts", "")
-    r["ts_human"] = humanize_ts(ts) if ts else ""
+    r = dict(r)
+    r["output"] = read_run_output(r)
+    epoch = record_epoch(r)
+    r["ts_human"] = humanize_age(int(time.time()) - epoch) if epoch is not None else ""
     return render_template("history_detail.html", detail=r, settings=load_settings(), active_page="history")
 
 
@@ -857,12 +1385,15 @@ def history_download():
         as_attachment=True,
         download_name="history.jsonl",
         mimetype="application/x-ndjson",
+        conditional=True,  # ETag/Last-Modified -> 304 when unchanged
+        max_age=0,  # always revalidate; the file changes after every run
     )
 
 
 @app.post("/history/clear")
 def history_clear():
     write_history([])
+    _prune_run_logs(keep=0)
     return redirect(url_for("history_get"))
 
 
@@ -873,11 +1404,27 @@ def history_clear():
 # - Tell the user whether the path is (a) not mounted, (b) missing, (c) not writable
 # - Only return "failed" for real job failures, not setup issues
 
+# A container's mounts are fixed for its lifetime, so one successful docker inspect
+# is reused; a failed one (e.g. socket not ready yet) is retried after MOUNT_MAP_RETRY_S.
+MOUNT_MAP_RETRY_S = 30.0
+_mount_map_cache: Optional[Tuple[float, list[tuple[str, str]]]] = None
+
+
 def _docker_mount_map() -> list[tuple[str, str]]:
     """
     Return list of (host_source, container_dest) mounts for THIS container.
     Uses docker inspect via /var/run/docker.sock (already mounted in your setup).
     """
+    global _mount_map_cache
+    cached = _mount_map_cache
+    if cached is not None and (cached[1] or time.monotonic() - cached[0] < MOUNT_MAP_RETRY_S):
+        return list(cached[1])
+    mounts = _inspect_mounts()
+    _mount_map_cache = (time.monotonic(), mounts)
+    return list(mounts)
+
+
+def _inspect_mounts() -> list[tuple[str, str]]:
     cid = os.environ.get("HOSTNAME", "").strip()  # container id
     if not cid:
         return []
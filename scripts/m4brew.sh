@@ -234,11 +234,13 @@ emit_summary() {
     wfrag=",\"warnings_count\":${warnings_count},\"warnings\":${warnings_json}"
   fi
 
+  local rfrag=""
   if [[ -n "${reason}" ]]; then
-    echo "__M4B_SUMMARY_JSON__ {\"mode\":\"${MODE}\",\"dry_run\":${DRY_RUN},\"success\":${success},\"runtime_s\":${runtime_s},\"root\":\"${ROOT}\",\"audio_mode\":\"${AUDIO_MODE}\",\"bitrate_kbps\":${bitrate_num},\"created\":${created},\"skipped\":${skipped},\"failed\":${failed},\"renamed\":${renamed},\"deleted\":${deleted}${wfrag},\"reason\":\"${reason}\"}"
-  else
-    echo "__M4B_SUMMARY_JSON__ {\"mode\":\"${MODE}\",\"dry_run\":${DRY_RUN},\"success\":${success},\"runtime_s\":${runtime_s},\"root\":\"${ROOT}\",\"audio_mode\":\"${AUDIO_MODE}\",\"bitrate_kbps\":${bitrate_num},\"created\":${created},\"skipped\":${skipped},\"failed\":${failed},\"renamed\":${renamed},\"deleted\":${deleted}${wfrag}}"
+    rfrag=",\"reason\":\"$(json_escape "${reason}")\""
   fi
+
+  # String fields are escaped so the line is always valid JSON (paths may contain quotes/backslashes)
+  echo "__M4B_SUMMARY_JSON__ {\"mode\":\"$(json_escape "${MODE}")\",\"dry_run\":${DRY_RUN},\"success\":${success},\"runtime_s\":${runtime_s},\"root\":\"$(json_escape "${ROOT}")\",\"audio_mode\":\"$(json_escape "${AUDIO_MODE}")\",\"bitrate_kbps\":${bitrate_num},\"created\":${created},\"skipped\":${skipped},\"failed\":${failed},\"renamed\":${renamed},\"deleted\":${deleted}${wfrag}${rfrag}}"
 }
 
 # Detect mono vs stereo using ffprobe inside the m4b-tool image